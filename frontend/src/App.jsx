@@ -6,6 +6,19 @@ import './App.css';
 
 const API_BASE_URL = 'http://localhost:5001';
 const SAMPLE_INPUT = '1P475773A.102SUK2545A0499Q14LIN18VLENOK';
+const PRINT_STATUS_POLL_MS = 500;
+const PRINT_STATUS_TIMEOUT_MS = 60000;
+
+// Print jobs are queued by the server; poll until the job completes or fails
+const waitForPrintJob = async (statusUrl) => {
+  const deadline = Date.now() + PRINT_STATUS_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const response = await axios.get(`${API_BASE_URL}${statusUrl}`);
+    if (response.data.status !== 'pending') return response.data;
+    await new Promise((resolve) => setTimeout(resolve, PRINT_STATUS_POLL_MS));
+  }
+  return { success: false, error: 'Timed out waiting for printer' };
+};
 
 const getDefaultLabelSettings = () => ({
   labelWidth: 100,
@@ -148,13 +161,17 @@ function App() {
         printer_name: selectedPrinter
       });
 
-      if (response.data.success) {
+      const result = response.data.success && response.data.status_url
+        ? await waitForPrintJob(response.data.status_url)
+        : response.data;
+
+      if (result.success) {
         setStatus({
           type: 'success',
           message: `Printed label for ${labelToPrint.parsed_data.part_no}`
         });
       } else {
-        setStatus({ type: 'error', message: response.data.error || 'Failed to print' });
+        setStatus({ type: 'error', message: result.error || 'Failed to print' });
       }
     } catch (error) {
       const errorMsg = error.response?.data?.error || error.message;
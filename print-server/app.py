@@ -1,35 +1,175 @@
 import os
+import sys
+import base64
 import logging
 import uuid
+import time
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from flask import Flask, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
-# Import the new service logic
-from services import NokiaLabelService, PrintService
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib-based provider
+    orjson = None
 
-import sys
+# Import the new service logic
+from services import (
+    PrintService, init_label_worker,
+    generate_label_job, generate_label_bytes_job, generate_batch_job
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_base_path():
-    if getattr(sys, 'frozen', False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.abspath(__file__))
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes API responses with orjson (C/Rust) instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Configuration
-BASE_DIR = get_base_path()
-TEMP_FOLDER = os.path.join(BASE_DIR, 'temp_labels')
+# Labels are short-lived, so keep them on a RAM-backed tmpfs when available
+if os.path.isdir('/dev/shm'):
+    TEMP_FOLDER = '/dev/shm/nokia_labels'
+else:
+    TEMP_FOLDER = os.path.join(tempfile.gettempdir(), 'nokia_labels')
 os.makedirs(TEMP_FOLDER, exist_ok=True)
 
-# Initialize Services
-label_service = NokiaLabelService(output_folder=TEMP_FOLDER)
+# Generated labels older than this are deleted by the background pruner
+LABEL_MAX_AGE_SECONDS = 10 * 60
+LABEL_PRUNE_INTERVAL_SECONDS = 60
+
+# Initialize Services (label generation lives in the generation_pool workers)
 print_service = PrintService()
 
+# Label rendering runs in child processes (ReportLab is not thread-safe).
+# Print jobs run on a single background thread: requests return as soon as a job
+# is queued, while PyMuPDF/GDI work stays serialized and labels print in order.
+# Both pools are created on first use, so spawned workers re-importing this
+# module do not build pools of their own.
+# ProcessPoolExecutor rejects more than 61 workers on Windows
+GENERATION_WORKERS = min(os.cpu_count() or 1, 61)
+generation_pool = None
+print_pool = None
+_pools_lock = threading.Lock()
+
+MAX_TRACKED_PRINT_JOBS = 500
+print_jobs = OrderedDict()
+print_jobs_lock = threading.Lock()
+
+def prune_old_labels():
+    """Deletes generated label PDFs that have not been used for LABEL_MAX_AGE_SECONDS."""
+    cutoff = time.time() - LABEL_MAX_AGE_SECONDS
+    try:
+        for entry in os.scandir(TEMP_FOLDER):
+            if not (entry.name.startswith('label_') and entry.name.endswith('.pdf')):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+    except OSError as e:
+        logger.error(f"Label cleanup error: {e}")
+
+def schedule_label_pruning():
+    prune_old_labels()
+    timer = threading.Timer(LABEL_PRUNE_INTERVAL_SECONDS, schedule_label_pruning)
+    timer.daemon = True
+    timer.start()
+
+_label_pruning_started = False
+_label_pruning_lock = threading.Lock()
+
+def start_label_pruning():
+    """
+    Starts the background pruner once per server process, however the app is
+    launched (python app.py, waitress-serve, import, frozen build).
+    """
+    global _label_pruning_started
+    # Spawned pool workers re-import this module as __mp_main__; a frozen worker runs
+    # it as __main__ before freeze_support(), with the spawn flag still in argv
+    if __name__ == '__mp_main__' or '--multiprocessing-fork' in sys.argv:
+        return
+    with _label_pruning_lock:
+        if _label_pruning_started:
+            return
+        _label_pruning_started = True
+    schedule_label_pruning()
+
+start_label_pruning()
+
+def get_generation_pool():
+    global generation_pool
+    with _pools_lock:
+        if generation_pool is None:
+            generation_pool = ProcessPoolExecutor(
+                max_workers=GENERATION_WORKERS,
+                initializer=init_label_worker,
+                initargs=(TEMP_FOLDER,)
+            )
+        return generation_pool
+
+def get_print_pool():
+    global print_pool
+    with _pools_lock:
+        if print_pool is None:
+            print_pool = ThreadPoolExecutor(max_workers=1)
+        return print_pool
+
+def run_generation_job(job, *args):
+    """Runs a label job in the generation pool and returns its result."""
+    global generation_pool
+    pool = get_generation_pool()
+    try:
+        return pool.submit(job, *args).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); every later submit would fail,
+        # so drop the pool and let the next request start a fresh one
+        logger.error("Label generation pool broke; replacing it")
+        with _pools_lock:
+            if generation_pool is pool:
+                generation_pool = None
+        pool.shutdown(wait=False)
+        raise
+
+def generate_label_in_pool(raw_input, settings):
+    return run_generation_job(generate_label_job, raw_input, settings)
+
+def submit_print_job(pdf_path, printer_name):
+    return track_print_job(get_print_pool().submit(print_service.print_file, pdf_path, printer_name))
+
+def submit_print_files_job(pdf_paths, printer_name):
+    return track_print_job(get_print_pool().submit(print_service.print_files, pdf_paths, printer_name))
+
+def track_print_job(future):
+    job_id = uuid.uuid4().hex
+    with print_jobs_lock:
+        print_jobs[job_id] = future
+        # Forget the oldest finished jobs once the registry is full
+        while len(print_jobs) > MAX_TRACKED_PRINT_JOBS:
+            oldest_id, oldest = next(iter(print_jobs.items()))
+            if not oldest.done():
+                break
+            del print_jobs[oldest_id]
+    return job_id
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'ok', 'message': 'Nokia Label Bridge is running'})
@@ -43,6 +183,8 @@ def list_printers():
 def generate_label():
     """
     Generates a label PDF and returns its path and parsed data.
+    With "inline_pdf": true the PDF is rendered in memory and returned
+    base64-encoded as `pdf_base64` instead of being saved for /api/label.
     """
     data = request.json
     raw_input = data.get('raw_input', '')
@@ -52,7 +194,16 @@ def generate_label():
         return jsonify({'success': False, 'error': 'No input data provided'}), 400
 
     try:
-        pdf_path, parsed_data = label_service.generate_label(raw_input, settings)
+        if data.get('inline_pdf'):
+            pdf_bytes, parsed_data = run_generation_job(generate_label_bytes_job, raw_input, settings)
+            return jsonify({
+                'success': True,
+                'message': 'Label generated',
+                'parsed_data': parsed_data,
+                'pdf_base64': base64.b64encode(pdf_bytes).decode('ascii')
+            })
+
+        pdf_path, parsed_data = generate_label_in_pool(raw_input, settings)
         filename = os.path.basename(pdf_path)
         
         return jsonify({
@@ -66,6 +217,47 @@ def generate_label():
         logger.error(f"Generation error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/generate-batch', methods=['POST'])
+def generate_batch():
+    """
+    Generates one multi-page PDF with a label per raw input.
+    With "print": true the whole batch is also queued as a single print job
+    (poll /api/print-status/<job_id>).
+    """
+    data = request.json
+    raw_inputs = data.get('raw_inputs') or []
+    settings = data.get('label_settings')
+    print_batch = bool(data.get('print'))
+    printer_name = data.get('printer_name') # Optional
+
+    if not isinstance(raw_inputs, list) or not raw_inputs or not all(isinstance(raw, str) and raw for raw in raw_inputs):
+        return jsonify({'success': False, 'error': 'raw_inputs must be a non-empty list of scan strings'}), 400
+
+    try:
+        pdf_path, parsed_data = run_generation_job(generate_batch_job, raw_inputs, settings)
+        filename = os.path.basename(pdf_path)
+
+        response = {
+            'success': True,
+            'message': f'{len(parsed_data)} labels generated',
+            'parsed_data': parsed_data,
+            'pdf_url': f"/api/label/{filename}"
+        }
+        if not print_batch:
+            return jsonify(response)
+
+        job_id = submit_print_job(pdf_path, printer_name)
+        response.update({
+            'message': f'{len(parsed_data)} labels generated and queued for printing',
+            'job_id': job_id,
+            'status_url': f"/api/print-status/{job_id}"
+        })
+        return jsonify(response), 202
+
+    except Exception as e:
+        logger.error(f"Batch generation error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/label/<filename>', methods=['GET'])
 def get_label(filename):
     """
@@ -80,40 +272,71 @@ def get_label(filename):
 @app.route('/api/print-label', methods=['POST'])
 def print_label():
     """
-    Prints a previously generated label.
+    Queues a previously generated label for printing.
+    With "pdf_urls" (a list) several labels are printed as one spooler job.
+    Returns 202 with a job id; poll /api/print-status/<job_id> for the outcome.
     """
     data = request.json
-    pdf_url = data.get('pdf_url', '')
+    pdf_urls = data.get('pdf_urls')
+    if pdf_urls is None:
+        pdf_urls = [data.get('pdf_url', '')]
     printer_name = data.get('printer_name')
 
-    if not pdf_url:
+    if not isinstance(pdf_urls, list) or not pdf_urls or not all(isinstance(url, str) and url for url in pdf_urls):
         return jsonify({'success': False, 'error': 'No PDF URL provided'}), 400
 
     try:
-        filename = pdf_url.split('/')[-1]
-        pdf_path = os.path.join(TEMP_FOLDER, filename)
+        pdf_paths = [os.path.join(TEMP_FOLDER, url.split('/')[-1]) for url in pdf_urls]
         
-        if not os.path.exists(pdf_path):
+        if not all(os.path.exists(pdf_path) for pdf_path in pdf_paths):
             return jsonify({'success': False, 'error': 'Label file not found on server'}), 404
 
-        success, message = print_service.print_file(pdf_path, printer_name)
-
-        if success:
-            return jsonify({'success': True, 'message': 'Label sent to printer'})
+        if len(pdf_paths) == 1:
+            job_id = submit_print_job(pdf_paths[0], printer_name)
         else:
-            return jsonify({'success': False, 'error': f"Printing failed: {message}"}), 500
+            job_id = submit_print_files_job(pdf_paths, printer_name)
+
+        return jsonify({
+            'success': True,
+            'message': 'Print job queued',
+            'job_id': job_id,
+            'status_url': f"/api/print-status/{job_id}"
+        }), 202
 
     except Exception as e:
         logger.error(f"Print error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/print-status/<job_id>', methods=['GET'])
+def print_status(job_id):
+    """
+    Reports the state of a queued print job: pending, completed or failed.
+    """
+    with print_jobs_lock:
+        future = print_jobs.get(job_id)
+
+    if future is None:
+        return jsonify({'success': False, 'error': 'Print job not found'}), 404
+
+    if not future.done():
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'pending'})
+
+    try:
+        success, message = future.result()
+    except Exception as e:
+        success, message = False, str(e)
+
+    if success:
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'completed', 'message': message})
+    return jsonify({'success': False, 'job_id': job_id, 'status': 'failed', 'error': f"Printing failed: {message}"})
+
 @app.route('/api/generate-and-print', methods=['POST'])
 def generate_and_print():
     """
     1. Receives raw scanner string.
     2. Parses & formats it.
     3. Generates PDF.
-    4. Prints automatically.
+    4. Queues it for printing (poll /api/print-status/<job_id>).
     """
     data = request.json
     raw_input = data.get('raw_input', '')
@@ -125,25 +348,37 @@ def generate_and_print():
 
     try:
         # Step 1: Generate the PDF Label
-        pdf_path, parsed_data = label_service.generate_label(raw_input, settings)
+        pdf_path, parsed_data = generate_label_in_pool(raw_input, settings)
         filename = os.path.basename(pdf_path)
 
-        # Step 2: Print the Label
-        success, message = print_service.print_file(pdf_path, printer_name)
+        # Step 2: Queue the Label for printing
+        job_id = submit_print_job(pdf_path, printer_name)
 
-        if success:
-            return jsonify({
-                'success': True, 
-                'message': 'Label generated and printed',
-                'parsed_data': parsed_data,
-                'pdf_url': f"/api/label/{filename}"
-            })
-        else:
-            return jsonify({'success': False, 'error': f"Printing failed: {message}"}), 500
+        return jsonify({
+            'success': True, 
+            'message': 'Label generated and queued for printing',
+            'parsed_data': parsed_data,
+            'pdf_url': f"/api/label/{filename}",
+            'job_id': job_id,
+            'status_url': f"/api/print-status/{job_id}"
+        }), 202
 
     except Exception as e:
         logger.error(f"Workflow error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Waitress threads only handle HTTP I/O; rendering is already spread across
+# generation_pool processes. Keep a single server process so the print job
+# registry (and its status polling) stays consistent.
+SERVER_THREADS = 8
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Required for the generation pool inside the frozen (PyInstaller) executable
+    multiprocessing.freeze_support()
+
+    if os.environ.get('FLASK_DEBUG') == '1':
+        app.run(host='0.0.0.0', port=5001, debug=True)
+    else:
+        from waitress import serve
+        logger.info(f"Serving on 0.0.0.0:5001 with waitress ({SERVER_THREADS} threads)")
+        serve(app, host='0.0.0.0', port=5001, threads=SERVER_THREADS)
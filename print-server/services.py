@@ -1,22 +1,108 @@
 import os
 import logging
 import re
-import uuid
+import json
+import itertools
+import hashlib
+import copy
+import threading
 import platform
 import subprocess
 import sys
+import time
 from io import BytesIO
+from collections import OrderedDict
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 from reportlab.graphics.barcode import code128
-from reportlab.graphics.barcode import createBarcodeDrawing
 from reportlab.graphics.barcode import ecc200datamatrix
+from reportlab.pdfbase import pdfmetrics
 from svglib.svglib import svg2rlg
 from reportlab.graphics import renderPDF
 
 
 logger = logging.getLogger(__name__)
 
+# Platform never changes at runtime, so detect it once instead of per request.
+_SYSTEM = platform.system()
+_IS_WINDOWS = (_SYSTEM == 'Windows')
+
+# Printing-only dependencies: GDI printing needs them on Windows, other
+# platforms hand the PDF to a viewer and never touch them.
+if _IS_WINDOWS:
+    import win32print
+    import win32ui
+    import win32con
+    from PIL import Image, ImageWin
+    import fitz  # PyMuPDF
+else:
+    win32print = win32ui = win32con = None
+    Image = ImageWin = fitz = None
+
+# Per-process sequence for generated label filenames. Combined with the pid
+# prefix names never collide; forked workers recompute the prefix.
+_LABEL_COUNTER = itertools.count()
+_LABEL_PREFIX = f"label_{os.getpid():x}_"
+
+
+def _reset_label_prefix():
+    global _LABEL_PREFIX
+    _LABEL_PREFIX = f"label_{os.getpid():x}_"
+
+
+if hasattr(os, 'register_at_fork'):  # Not on Windows, where workers are spawned
+    os.register_at_fork(after_in_child=_reset_label_prefix)
+
+# ISO-15434 control characters
+RS = chr(30)
+GS = chr(29)
+EOT = chr(4)
+
+# Field patterns used by parse_nokia_string, compiled once at import
+# Every field token of a concatenated scan; none of them contains the start of another
+_FIELD_TOKEN_RE = re.compile(r'(1P|18V|10D|4L|S|Q)')
+# Tokens that end a part / serial value (a part may contain '1P', a serial may contain 'S')
+_PART_STOPS = frozenset(('S', 'Q', '18V', '4L', '10D'))
+_SERIAL_STOPS = frozenset(('Q', '1P', '18V', '4L', '10D'))
+_ALL_FIELD_TOKENS = frozenset(('1P', 'S', 'Q', '4L', '18V', '10D'))
+
+_QTY_RE = re.compile(r'Q(\d+)(.*)$')
+_DIGITS_RE = re.compile(r'\d+')
+_QTY_PAYLOAD_RE = re.compile(r'^(\d+)(.*)$')
+# One optionally-prefixed segment: leading text, or 4L/18V/10D up to the next marker
+_ADDITIONAL_SEGMENT_RE = re.compile(r'(?:4L|18V|10D)?[^41]*(?:(?:4(?!L)|1(?!8V|0D))[^41]*)*')
+# 4L/18V segments inside a concatenated payload, emitted in this order
+_NAMED_PREFIXES = ('4L', '18V')
+
+# Segment delimiters in priority order: GS wins over a stray '|' or '~' wherever they occur
+_DELIMITERS = (GS, '|', '~')
+
+
+def _value_after(pieces, index, stops, strip_tail=False):
+    """
+    Text following the token at pieces[index] (from _FIELD_TOKEN_RE.split) up to the
+    next token in `stops`. Returns None if it spans a line break, mirroring `.` / `$`.
+    With `strip_tail`, trailing whitespace of the scan is ignored.
+    """
+    end = index + 2
+    while end < len(pieces):
+        # Text before a later token is never the final newline `$` allows; stop here
+        # so the scan stays linear on multi-line input
+        if '\n' in pieces[end - 1]:
+            return None
+        if pieces[end] in stops:
+            break
+        end += 2
+    # Tokens that are not stops stay part of the value
+    value = ''.join(pieces[index + 1:end])
+    if end >= len(pieces):
+        if strip_tail:
+            value = value.rstrip()
+        elif value.endswith('\n'):
+            # Like regex `$`, a value may end just before a final newline
+            value = value[:-1]
+    return None if '\n' in value else value
+
 
 def _patch_reportlab_ecc200_ascii():
     """
@@ -55,10 +141,68 @@ def _patch_reportlab_ecc200_ascii():
 
 _patch_reportlab_ecc200_ascii()
 
+# All label text uses one standard Type 1 font; load its metrics once at import
+LABEL_FONT = "Helvetica-Bold"
+pdfmetrics.getFont(LABEL_FONT)
+
+
+# Layout component keys holding mm geometry; everything else (font sizes, text) is unitless
+_MM_KEYS = frozenset(('x', 'y', 'w', 'h', 'size'))
+
+# Default label settings (Measurements in mm, Font in pt).
+# Shared template: _merge_settings copies it before applying caller settings.
+_DEFAULT_SETTINGS = {
+    'labelWidth': 100,
+    'labelHeight': 38,
+    'barcodeWidthModule': 0.3,
+    'amidMappings': None,  # Filled per call from NokiaLabelService._default_amid_mappings()
+    'layout': {
+        'nokiaLogo': {'x': -2.3, 'y': -1.5, 'w': 24.63, 'h': 9.87},
+        'nokiaText': {'x': 28.0, 'y': 0.1, 'fontSize': 14},
+        'amidText': {'x': 77.0, 'y': 5.9, 'fontSize': 14},
+        'ceMark': {'x': 62.0, 'y': 7.0, 'w': 10.09, 'h': 9.83},
+        'ukcaMark': {'x': 63.0, 'y': 20.0, 'w': 10.01, 'h': 10.0},
+        'barcode1': {'x': 2.0, 'y': 6.6, 'h': 5.0, 'fontSize': 10, 'label': '1P'},
+        'barcode2': {'x': 2.0, 'y': 17.0, 'h': 5.0, 'fontSize': 10, 'label': 'S'},
+        'barcode3': {'x': 2.0, 'y': 28.0, 'h': 4.0, 'fontSize': 10, 'label': 'Q'},
+        'dmBarcode': {'x': 75.0, 'y': 12.5, 'size': 18.0},
+        'footer': {'x': 85.0, 'y': 35.0, 'fontSize': 8, 'text': 'Made in India'}
+    }
+}
+
 # --- NEW SERVICE: Handles Parsing & PDF Creation ---
 class NokiaLabelService:
+    # Fixed ISO-15434 envelope: [)> + RS + 06 + GS ... RS + EOT
+    _ISO_HEADER = f"[)>{RS}06{GS}"
+    _ISO_FOOTER = f"{RS}{EOT}"
+
+    # Number of generated PDFs remembered for identical (raw_string, settings) requests.
+    # The cache is per instance, i.e. per generation_pool worker: a repeated scan only
+    # hits when it lands on the worker that rendered it first.
+    LABEL_CACHE_SIZE = 256
+    # Number of encoded DataMatrix symbols kept for reprints of the same content
+    DATAMATRIX_CACHE_SIZE = 128
+    # Number of UKCA mark sizes kept; layout editing can produce many transient sizes
+    UKCA_SCALE_CACHE_SIZE = 16
+    # 1D barcodes may extend up to the CE mark (58 mm from the left edge)
+    BARCODE_LIMIT_PT = 58 * mm
+
     def __init__(self, output_folder):
         self.output_folder = output_folder
+        self._label_cache = OrderedDict()
+        self._label_cache_lock = threading.Lock()
+        self._dm_cache = OrderedDict()
+        self._dm_cache_lock = threading.Lock()
+        # Parsed UKCA SVG and its scaled copies keyed by (w, h) in mm
+        self._ukca_drawing = None
+        self._ukca_scale_cache = {}
+        # Fixed label artwork: resolve paths once (None when the asset is missing).
+        # Paths, not ImageReader objects, go to drawImage: for a reader ReportLab
+        # hashes the full decoded bitmap on every call to find its XObject name.
+        assets_dir = os.path.join(self._get_base_path(), 'assets')
+        self._logo_path = self._existing_asset(assets_dir, 'Nokia-Logo.jpg')
+        self._ce_path = self._existing_asset(assets_dir, 'CC.bmp')
+        self._ukca_path = self._existing_asset(assets_dir, 'UKCA black fill.svg')
         logger.info("--- NokiaLabelService Initialized (Direct Printing Version v2.4) ---")
 
     def _default_amid_mappings(self):
@@ -101,83 +245,103 @@ class NokiaLabelService:
         if not payload:
             return []
 
-        pattern = r'(4L|18V|10D)'
-        matches = list(re.finditer(pattern, payload))
-
-        if not matches:
-            return [payload]
-
+        # A single left-to-right scan; empty matches and padding are dropped.
+        # One compiled findall beats a str.find loop over the three markers here:
+        # the loop needs a find per marker per segment at Python level.
         segments = []
-
-        if matches[0].start() > 0:
-            leading = payload[:matches[0].start()].strip()
-            if leading:
-                segments.append(leading)
-
-        for i, match in enumerate(matches):
-            start = match.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(payload)
-            segment = payload[start:end].strip()
+        for segment in _ADDITIONAL_SEGMENT_RE.findall(payload):
+            segment = segment.strip()
             if segment:
                 segments.append(segment)
 
         return segments
 
-    def _extract_named_segments(self, text, prefixes, stop_tokens):
+    def _parse_concatenated(self, clean_string, parsed):
         """
-        Extracts prefixed segments from a concatenated payload.
-        Returns segments ordered by the `prefixes` argument.
+        Fills `parsed` from a scan without delimiters (e.g. 061P475773A.102SUK2545A0510Q1)
+        with one split over the field tokens. A value runs up to the next token in its stop set;
+        a candidate whose value would span a line break is skipped.
         """
-        payload = (text or '').strip()
-        if not payload:
-            return []
-
-        prefix_pattern = '|'.join(re.escape(prefix) for prefix in prefixes)
-        stop_pattern = '|'.join(re.escape(token) for token in stop_tokens)
-        pattern = rf'({prefix_pattern})(.*?)(?={stop_pattern}|$)'
+        # Alternating [text, token, text, token, ..., text]
+        pieces = _FIELD_TOKEN_RE.split(clean_string)
+
+        part = serial = None
+        named = {}
+        for index in range(1, len(pieces), 2):
+            kind = pieces[index]
+            if kind == '1P':
+                if part is None:
+                    part = _value_after(pieces, index, _PART_STOPS)
+            elif kind == 'S':
+                if serial is None:
+                    serial = _value_after(pieces, index, _SERIAL_STOPS)
+            elif kind in _NAMED_PREFIXES and kind not in named:
+                value = _value_after(pieces, index, _ALL_FIELD_TOKENS, strip_tail=True)
+                if value and value.strip():
+                    named[kind] = f"{kind}{value.strip()}"
+
+        # Quantity keeps its own search: Q + digits, with the rest of the scan as suffix
+        q_match = _QTY_RE.search(clean_string)
+
+        # 1. Part Number (starts with 1P, ends before S, Q, or other field)
+        if part is not None:
+            parsed['part_no'] = part.strip()
+
+        # 2. Serial Number (starts with S, ends before Q, 1P, or other field)
+        if serial is not None:
+            val = serial.strip()
+            parsed['serial_no'] = val
+            parsed['serial_segments'] = [val]
+
+        # 3. Quantity + post-Q segments (e.g. Q14LIN18VLENOK)
+        if q_match:
+            digits = q_match.group(1)
+            suffix = q_match.group(2).strip()
+
+            if suffix and digits:
+                # Nokia payloads can concatenate: Q1 + 4LIN + 18V...
+                parsed['qty'] = digits[0]
+                remainder = f"{digits[1:]}{suffix}".strip()
+                if remainder and not named:
+                    parsed['post_qty_segments'] = self._split_additional_segments(remainder)
+            else:
+                parsed['qty'] = digits
 
-        found = {}
-        for match in re.finditer(pattern, payload):
-            prefix = match.group(1)
-            value = match.group(2).strip()
-            segment = f"{prefix}{value}"
-            if prefix not in found and len(segment) > len(prefix):
-                found[prefix] = segment
+        # 4L/18V can appear before or after Q in raw concatenated scans.
+        # Normalize these segments for QR output in expected order: 4L then 18V.
+        if named:
+            parsed['post_qty_segments'] = [named[prefix] for prefix in _NAMED_PREFIXES if prefix in named]
 
-        return [found[prefix] for prefix in prefixes if prefix in found]
+        return parsed
 
     def parse_nokia_string(self, raw_string):
         """
         Advanced parser for Nokia strings. 
         Detects if the scan already has ISO-15434 formatting or if it's raw.
         """
-        GS = chr(29)
-        RS = chr(30)
-        EOT = chr(4)
-        
         # Clean potential whitespace
         clean_string = raw_string.strip()
         
         # Handle ISO-15434 wrapping [)>RS06GS...RSEOT
         if clean_string.startswith("[)>"):
-            try:
-                # Find the first GS to get to the payload
-                if GS in clean_string:
-                    clean_string = clean_string.split(GS, 1)[1]
-                # Remove footer
-                if RS in clean_string:
-                    clean_string = clean_string.split(RS, 1)[0]
-                elif EOT in clean_string:
-                    clean_string = clean_string.split(EOT, 1)[0]
-            except:
-                pass
+            # Find the first GS to get to the payload
+            _, sep, payload = clean_string.partition(GS)
+            if sep:
+                clean_string = payload
+            # Remove footer
+            payload, sep, _ = clean_string.partition(RS)
+            if not sep:
+                payload, sep, _ = clean_string.partition(EOT)
+            if sep:
+                clean_string = payload
 
         # Now we have a payload that contains GS or other delimiter
         # Sometimes scanners replace GS with other characters like |, ~, or just omit it
-        # If we see common delimiters, use them
-        delimiters = [GS, '|', '~', '']
+        # If we see common delimiters, use them. Every scan is probed: detection is
+        # a few substring checks, and GS must win whenever present, so skipping it
+        # for a site's usual dialect would not be safe.
         main_delimiter = None
-        for d in delimiters:
+        for d in _DELIMITERS:
             if d in clean_string:
                 main_delimiter = d
                 break
@@ -199,47 +363,7 @@ class NokiaLabelService:
             elif clean_string.startswith("06"):
                 clean_string = clean_string[2:]
             
-            # Split by common prefixes to isolate fields
-            # We look for 1P, S, Q, 18V, 4L, 10D as delimiters
-            # Example: 061P475773A.102SUK2545A0510Q1
-            
-            # 1. Extract Part Number (Starts with 1P, ends before S, Q, or other field)
-            p_match = re.search(r'1P(.*?)(?=S|Q|18V|4L|10D|$)', clean_string)
-            if p_match: parsed['part_no'] = p_match.group(1).strip()
-            
-            # 2. Extract Serial Number (Starts with S, ends before Q, 1P, or other field)
-            s_match = re.search(r'S(.*?)(?=Q|1P|18V|4L|10D|$)', clean_string)
-            if s_match: 
-                val = s_match.group(1).strip()
-                parsed['serial_no'] = val
-                parsed['serial_segments'] = [val]
-                
-            # 3. Extract Quantity + post-Q segments (e.g. Q14LIN18VLENOK)
-            q_match = re.search(r'Q(\d+)(.*)$', clean_string)
-            if q_match:
-                digits = q_match.group(1)
-                suffix = q_match.group(2).strip()
-
-                if suffix and digits:
-                    # Nokia payloads can concatenate: Q1 + 4LIN + 18V...
-                    parsed['qty'] = digits[0]
-                    remainder = f"{digits[1:]}{suffix}".strip()
-                    if remainder:
-                        parsed['post_qty_segments'] = self._split_additional_segments(remainder)
-                else:
-                    parsed['qty'] = digits
-
-            # 4L/18V can appear before or after Q in raw concatenated scans.
-            # Normalize these segments for QR output in expected order: 4L then 18V.
-            normalized_segments = self._extract_named_segments(
-                clean_string,
-                prefixes=['4L', '18V'],
-                stop_tokens=['4L', '18V', '10D', 'Q', '1P', 'S']
-            )
-            if normalized_segments:
-                parsed['post_qty_segments'] = normalized_segments
-
-            return parsed
+            return self._parse_concatenated(clean_string, parsed)
 
         segments = clean_string.split(main_delimiter)
         parsed = {
@@ -251,65 +375,78 @@ class NokiaLabelService:
             'post_qty_segments': []
         }
         
+        handlers = self._SEGMENT_HANDLERS
         for seg in segments:
             seg = seg.strip()
             if not seg: continue
             
-            if seg.startswith('1P'):
-                parsed['part_no'] = seg[2:]
-            elif seg.startswith('Q'):
-                q_payload = seg[1:].strip()
-                if re.fullmatch(r'\d+', q_payload):
-                    parsed['qty'] = q_payload
-                else:
-                    m = re.match(r'^(\d+)(.*)$', q_payload)
-                    if m:
-                        digits, suffix = m.groups()
-                        suffix = suffix.strip()
-                        if suffix and digits:
-                            parsed['qty'] = digits[0]
-                            remainder = f"{digits[1:]}{suffix}".strip()
-                            if remainder:
-                                parsed['post_qty_segments'].extend(self._split_additional_segments(remainder))
-                        else:
-                            parsed['qty'] = digits
-            elif seg.startswith('S'):
-                parsed['serial_segments'].append(seg[1:])
-            elif seg.startswith(('4L', '18V', '10D')):
-                parsed['post_qty_segments'].append(seg)
-            else:
-                parsed['serial_segments'].append(seg)
+            # Application identifiers are 1-3 characters; none is a prefix of another
+            handler = (handlers.get(seg[:1]) or handlers.get(seg[:2])
+                       or handlers.get(seg[:3]) or NokiaLabelService._take_unlabelled_segment)
+            handler(self, seg, parsed)
         
+        # Joined once here: the DataMatrix payload, barcode 2 and the API response all read it
         if parsed['serial_segments']:
             parsed['serial_no'] = GS.join(parsed['serial_segments'])
 
         return parsed
 
+    # --- Delimited segment handlers, dispatched on the application identifier ---
+    def _take_part_segment(self, seg, parsed):
+        parsed['part_no'] = seg[2:]
+
+    def _take_qty_segment(self, seg, parsed):
+        q_payload = seg[1:].strip()
+        if _DIGITS_RE.fullmatch(q_payload):
+            parsed['qty'] = q_payload
+            return
+        m = _QTY_PAYLOAD_RE.match(q_payload)
+        if m:
+            digits, suffix = m.groups()
+            suffix = suffix.strip()
+            if suffix and digits:
+                parsed['qty'] = digits[0]
+                remainder = f"{digits[1:]}{suffix}".strip()
+                if remainder:
+                    parsed['post_qty_segments'].extend(self._split_additional_segments(remainder))
+            else:
+                parsed['qty'] = digits
+
+    def _take_serial_segment(self, seg, parsed):
+        parsed['serial_segments'].append(seg[1:])
+
+    def _take_additional_segment(self, seg, parsed):
+        parsed['post_qty_segments'].append(seg)
+
+    def _take_unlabelled_segment(self, seg, parsed):
+        # Segments without a known identifier are kept as part of the serial
+        parsed['serial_segments'].append(seg)
+
+    _SEGMENT_HANDLERS = {
+        '1P': _take_part_segment,
+        'Q': _take_qty_segment,
+        'S': _take_serial_segment,
+        '4L': _take_additional_segment,
+        '18V': _take_additional_segment,
+        '10D': _take_additional_segment,
+    }
+
     def construct_iso15434_string(self, parsed_data):
         """
         Constructs the Data Matrix payload with real ISO-15434 control characters.
         Format: [)> + RS + 06 + GS + 1P... + GS + S... + GS + Q... + ... + RS + EOT
         """
-        RS = chr(30)
-        GS = chr(29)
-        EOT = chr(4)
-
-        formatted = "[)>" + RS + "06" + GS
-        formatted += f"1P{parsed_data['part_no']}{GS}"
-
-        if parsed_data.get('serial_segments'):
-            formatted += "S" + GS.join(parsed_data['serial_segments']) + GS
-        else:
-            formatted += f"S{parsed_data['serial_no']}{GS}"
-
-        formatted += f"Q{parsed_data['qty']}"
+        # serial_no is already the GS-joined form of serial_segments
+        parts = [self._ISO_HEADER, "1P", parsed_data['part_no'], GS, "S", parsed_data['serial_no'], GS, "Q", parsed_data['qty']]
 
-        for segment in parsed_data.get('post_qty_segments', []):
-            formatted += f"{GS}{segment}"
+        post_qty_segments = parsed_data.get('post_qty_segments')
+        if post_qty_segments:
+            parts.append(GS)
+            parts.append(GS.join(post_qty_segments))
 
-        formatted += RS + EOT
+        parts.append(self._ISO_FOOTER)
 
-        return formatted
+        return "".join(parts)
 
     def make_datamatrix_debug_string(self, datamatrix_value):
         """
@@ -317,11 +454,92 @@ class NokiaLabelService:
         """
         return (
             datamatrix_value
-            .replace(chr(30), "{RS}")
-            .replace(chr(29), "{GS}")
-            .replace(chr(4), "{EOT}")
+            .replace(RS, "{RS}")
+            .replace(GS, "{GS}")
+            .replace(EOT, "{EOT}")
         )
 
+    def _get_datamatrix_runs(self, content):
+        """
+        Returns (cols, rows, runs) for the DataMatrix of `content`, encoding it only on a
+        cache miss. `runs` holds (x, y, length) spans of dark modules, bottom row first.
+        """
+        with self._dm_cache_lock:
+            symbol = self._dm_cache.get(content)
+            if symbol is not None:
+                self._dm_cache.move_to_end(content)
+                return symbol
+
+        encoder = ecc200datamatrix.ECC200DataMatrix(value=content)
+        encoder.validate()
+        if not encoder.valid:
+            raise ValueError("Illegal barcode with value '%s' in code 'ECC200DataMatrix'" % content)
+
+        runs = []
+        for y, row in enumerate(encoder.encode()):
+            x = 0
+            while x < len(row):
+                if row[x]:
+                    start = x
+                    while x < len(row) and row[x]:
+                        x += 1
+                    runs.append((start, y, x - start))
+                else:
+                    x += 1
+        symbol = (encoder.col_modules, encoder.row_modules, tuple(runs))
+
+        with self._dm_cache_lock:
+            self._dm_cache[content] = symbol
+            while len(self._dm_cache) > self.DATAMATRIX_CACHE_SIZE:
+                self._dm_cache.popitem(last=False)
+
+        return symbol
+
+    def _draw_datamatrix(self, c, content, x, y, size_pt):
+        """
+        Draws the DataMatrix as one filled path of module runs. Same output as
+        createBarcodeDrawing + drawOn without building a shape per module.
+        """
+        cols, rows, runs = self._get_datamatrix_runs(content)
+        module_w = size_pt / cols
+        module_h = size_pt / rows
+
+        path = c.beginPath()
+        for run_x, run_y, length in runs:
+            path.rect(x + run_x * module_w, y + run_y * module_h, length * module_w, module_h)
+
+        c.saveState()
+        c.setFillColorRGB(0, 0, 0)
+        c.drawPath(path, stroke=0, fill=1)
+        c.restoreState()
+
+    def _get_ukca_drawing(self, svg_path, w_mm, h_mm):
+        """
+        Returns the UKCA mark scaled to w_mm x h_mm, or None if the SVG has no size.
+        The SVG is parsed once; each requested size is scaled once and reused.
+        """
+        key = (w_mm, h_mm)
+        drawing = self._ukca_scale_cache.get(key)
+        if drawing is not None:
+            return drawing
+
+        if self._ukca_drawing is None:
+            # Render SVG to ReportLab Graphics Drawing
+            self._ukca_drawing = svg2rlg(svg_path)
+
+        source = self._ukca_drawing
+        # Drawing initial width/height: drawing.width, drawing.height
+        if not (source.width > 0 and source.height > 0):
+            return None
+
+        # Scale a copy to fit target width/height
+        drawing = copy.deepcopy(source)
+        drawing.scale((w_mm * mm) / source.width, (h_mm * mm) / source.height)
+        if len(self._ukca_scale_cache) >= self.UKCA_SCALE_CACHE_SIZE:
+            self._ukca_scale_cache.clear()
+        self._ukca_scale_cache[key] = drawing
+        return drawing
+
     def _get_base_path(self):
         """Helper to get the correct base path whether running as script or EXE."""
         if getattr(sys, 'frozen', False):
@@ -331,32 +549,112 @@ class NokiaLabelService:
             return sys._MEIPASS
         return os.path.dirname(os.path.abspath(__file__))
 
+    @staticmethod
+    def _existing_asset(assets_dir, name):
+        path = os.path.join(assets_dir, name)
+        return path if os.path.exists(path) else None
+
+    def _label_cache_key(self, raw_string, settings):
+        return hashlib.sha256(
+            raw_string.encode('utf-8') + json.dumps(settings, sort_keys=True).encode('utf-8')
+        ).digest()
+
     def generate_label(self, raw_string, settings=None):
         """
-        Orchestrates the creation of the label PDF with Dynamic Layout (v2.4)
+        Returns (file_path, parsed_data) for the label, reusing a previously
+        generated PDF when the same scan is requested with the same settings.
         """
-        # Default Settings (Measurements in mm, Font in pt)
-        default_settings = {
-            'labelWidth': 100,
-            'labelHeight': 38,
-            'barcodeWidthModule': 0.3,
-            'amidMappings': self._default_amid_mappings(),
-            'layout': {
-                'nokiaLogo': {'x': -2.3, 'y': -1.5, 'w': 24.63, 'h': 9.87},
-                'nokiaText': {'x': 28.0, 'y': 0.1, 'fontSize': 14},
-                'amidText': {'x': 77.0, 'y': 5.9, 'fontSize': 14},
-                'ceMark': {'x': 62.0, 'y': 7.0, 'w': 10.09, 'h': 9.83},
-                'ukcaMark': {'x': 63.0, 'y': 20.0, 'w': 10.01, 'h': 10.0},
-                'barcode1': {'x': 2.0, 'y': 6.6, 'h': 5.0, 'fontSize': 10, 'label': '1P'},
-                'barcode2': {'x': 2.0, 'y': 17.0, 'h': 5.0, 'fontSize': 10, 'label': 'S'},
-                'barcode3': {'x': 2.0, 'y': 28.0, 'h': 4.0, 'fontSize': 10, 'label': 'Q'},
-                'dmBarcode': {'x': 75.0, 'y': 12.5, 'size': 18.0},
-                'footer': {'x': 85.0, 'y': 35.0, 'fontSize': 8, 'text': 'Made in India'}
-            }
-        }
-        
+        key = self._label_cache_key(raw_string, settings)
+
+        with self._label_cache_lock:
+            cached = self._label_cache.get(key)
+            if cached is not None:
+                # The label folder is pruned from outside; never hand out a path that is gone
+                if os.path.exists(cached[0]):
+                    try:
+                        # Refresh mtime so age-based cleanup counts from the last use
+                        os.utime(cached[0])
+                        self._label_cache.move_to_end(key)
+                        return cached[0], dict(cached[1])
+                    except OSError:
+                        pass
+                del self._label_cache[key]
+
+        pdf_bytes, data = self.generate_label_bytes(raw_string, settings)
+        file_path = self._new_label_path()
+        with open(file_path, 'wb') as f:
+            f.write(pdf_bytes)
+
+        with self._label_cache_lock:
+            self._label_cache[key] = (file_path, data)
+            while len(self._label_cache) > self.LABEL_CACHE_SIZE:
+                _, (old_path, _) = self._label_cache.popitem(last=False)
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+        return file_path, dict(data)
+
+    def _new_label_path(self):
+        filename = f"{_LABEL_PREFIX}{next(_LABEL_COUNTER):x}.pdf"
+        return os.path.join(self.output_folder, filename)
+
+    def generate_label_bytes(self, raw_string, settings=None):
+        """
+        Renders the label PDF in memory and returns (pdf_bytes, parsed_data)
+        without touching the output folder.
+        """
+        buffer = BytesIO()
+        data = self._render_label(raw_string, settings, buffer)
+        return buffer.getvalue(), data
+
+    def generate_batch(self, raw_strings, settings=None):
+        """
+        Renders several scans into one multi-page PDF (one label per page),
+        sharing a single canvas and output file across the batch.
+        Returns (file_path, [parsed_data, ...]) in input order.
+        """
+        if not raw_strings:
+            raise ValueError("generate_batch needs at least one raw string")
+
+        s = self._merge_settings(settings)
+
+        file_path = self._new_label_path()
+
+        points = self._layout_points(s)
+
+        c = canvas.Canvas(file_path, pagesize=(s['labelWidth']*mm, s['labelHeight']*mm))
+        parsed = []
+        for index, raw_string in enumerate(raw_strings):
+            if index:
+                c.showPage()
+            parsed.append(self._draw_label(c, raw_string, s, points))
+        c.save()
+
+        return file_path, parsed
+
+    def _render_label(self, raw_string, settings, output):
+        """
+        Orchestrates the creation of the label PDF with Dynamic Layout (v2.4).
+        `output` is a file path or a writable binary file object.
+        """
+        s = self._merge_settings(settings)
+
+        c = canvas.Canvas(output, pagesize=(s['labelWidth']*mm, s['labelHeight']*mm))
+        data = self._draw_label(c, raw_string, s, self._layout_points(s))
+        c.save()
+        return data
+
+    def _merge_settings(self, settings):
+        """Returns the default layout deep-merged with the caller's settings."""
+        # Fresh working copy: top-level values plus one new dict per layout component,
+        # so merging caller settings never touches the shared template
+        s = {key: value for key, value in _DEFAULT_SETTINGS.items() if key != 'layout'}
+        s['amidMappings'] = self._default_amid_mappings()
+        s['layout'] = {comp_key: dict(comp_val) for comp_key, comp_val in _DEFAULT_SETTINGS['layout'].items()}
+
         # Deep merge settings
-        s = default_settings.copy()
         if settings:
             # Update top level keys first (except layout)
             for key in settings:
@@ -374,7 +672,36 @@ class NokiaLabelService:
         s['amidMappings'] = self._sanitize_amid_mappings(s.get('amidMappings'))
         if not s['amidMappings']:
             s['amidMappings'] = self._default_amid_mappings()
-        
+
+        return s
+
+    def _layout_points(self, s):
+        """
+        Converts the mm geometry of merged settings `s` to points once per canvas, so
+        drawing a label needs no unit conversions. Other values are copied as-is.
+        """
+        return {
+            'labelHeight': s['labelHeight'] * mm,
+            'barcodeWidthModule': s['barcodeWidthModule'] * mm,
+            'layout': {
+                comp_key: {key: value * mm if key in _MM_KEYS else value for key, value in comp_val.items()}
+                for comp_key, comp_val in s['layout'].items() if isinstance(comp_val, dict)
+            },
+        }
+
+    @staticmethod
+    def _set_label_font(c, size):
+        """Sets the label font, skipping setFont when the page already uses that size."""
+        # ReportLab resets the canvas font state on every new page, so comparing with it is safe
+        if c._fontsize != size or c._fontname != LABEL_FONT:
+            c.setFont(LABEL_FONT, size)
+
+    def _draw_label(self, c, raw_string, s, points):
+        """
+        Parses `raw_string` and draws its label onto the current page of canvas `c`
+        using merged settings `s` and their `points` (see _layout_points).
+        Returns the parsed data.
+        """
         # 1. Parse Data
         data = self.parse_nokia_string(raw_string)
         data['amid_code'] = self._resolve_amid_code(data.get('part_no'), s['amidMappings'])
@@ -384,133 +711,164 @@ class NokiaLabelService:
         data['datamatrix_value'] = datamatrix_content
         data['datamatrix_debug'] = self.make_datamatrix_debug_string(datamatrix_content)
 
-        # 3. Define PDF Filename
-        filename = f"label_{uuid.uuid4().hex}.pdf"
-        file_path = os.path.join(self.output_folder, filename)
-
-        # Assets paths
-        base_dir = self._get_base_path()
-        assets_dir = os.path.join(base_dir, 'assets')
-        logo_path = os.path.join(assets_dir, 'Nokia-Logo.jpg')
-        ce_path = os.path.join(assets_dir, 'CC.bmp')
-        ukca_path = os.path.join(assets_dir, 'UKCA black fill.svg')
+        # 3. Draw label using ReportLab
+        label_h_pt = points['labelHeight']
+        bar_module_pt = points['barcodeWidthModule']
 
-        # 4. Draw PDF using ReportLab
-        c = canvas.Canvas(file_path, pagesize=(s['labelWidth']*mm, s['labelHeight']*mm)) 
-        
         l = s['layout']
+        # Layout geometry already in points (see _layout_points)
+        p = points['layout']
         
         # Helper to convert CODESOFT (Top-Left) to ReportLab (Bottom-Left)
         # Y_RL = LabelHeight - Y_CS - Height
-        def get_rl_y(cs_y, height_mm):
-            return (s['labelHeight'] - cs_y - height_mm) * mm
+        def get_rl_y(cs_y_pt, height_pt):
+            return label_h_pt - cs_y_pt - height_pt
 
         # --- DRAW IMAGES ---
         # 1. Nokia Logo
-        if os.path.exists(logo_path):
-            cfg = l['nokiaLogo']
-            c.drawImage(logo_path, cfg['x']*mm, get_rl_y(cfg['y'], cfg['h']), 
-                        width=cfg['w']*mm, height=cfg['h']*mm, preserveAspectRatio=True)
+        if self._logo_path is not None:
+            cfg = p['nokiaLogo']
+            c.drawImage(self._logo_path, cfg['x'], get_rl_y(cfg['y'], cfg['h']), 
+                        width=cfg['w'], height=cfg['h'], preserveAspectRatio=True)
         
         # 2. CE Mark
-        if os.path.exists(ce_path):
-            cfg = l['ceMark']
-            c.drawImage(ce_path, cfg['x']*mm, get_rl_y(cfg['y'], cfg['h']), 
-                        width=cfg['w']*mm, height=cfg['h']*mm, preserveAspectRatio=True)
+        if self._ce_path is not None:
+            cfg = p['ceMark']
+            c.drawImage(self._ce_path, cfg['x'], get_rl_y(cfg['y'], cfg['h']), 
+                        width=cfg['w'], height=cfg['h'], preserveAspectRatio=True)
 
         # 3. UKCA Mark
-        if os.path.exists(ukca_path):
-            cfg = l['ukcaMark']
+        ukca_path = self._ukca_path
+        if ukca_path is not None:
+            cfg = p['ukcaMark']
             if ukca_path.endswith('.svg'):
-                # Render SVG to ReportLab Graphics Drawing
-                drawing = svg2rlg(ukca_path)
-                # Scale drawing to fit target width/height
-                # Drawing initial width/height: drawing.width, drawing.height
-                if drawing.width > 0 and drawing.height > 0:
-                    scale_x = (cfg['w'] * mm) / drawing.width
-                    scale_y = (cfg['h'] * mm) / drawing.height
-                    drawing.scale(scale_x, scale_y)
+                drawing = self._get_ukca_drawing(ukca_path, l['ukcaMark']['w'], l['ukcaMark']['h'])
+                if drawing is not None:
                     # Use renderPDF to draw on the canvas
-                    renderPDF.draw(drawing, c, cfg['x']*mm, get_rl_y(cfg['y'], cfg['h']))
+                    renderPDF.draw(drawing, c, cfg['x'], get_rl_y(cfg['y'], cfg['h']))
             else:
-                c.drawImage(ukca_path, cfg['x']*mm, get_rl_y(cfg['y'], cfg['h']), 
-                            width=cfg['w']*mm, height=cfg['h']*mm)
+                c.drawImage(ukca_path, cfg['x'], get_rl_y(cfg['y'], cfg['h']), 
+                            width=cfg['w'], height=cfg['h'])
 
         
         # --- DRAW TEXT ---
         # Nokia Text
-        cfg = l['nokiaText']
-        c.setFont("Helvetica-Bold", cfg['fontSize'])
-        c.drawString(cfg['x']*mm, (s['labelHeight'] - cfg['y'])*mm - (cfg['fontSize']/2.8)*mm, "Nokia Solutions and Networks")
+        cfg = p['nokiaText']
+        self._set_label_font(c, cfg['fontSize'])
+        c.drawString(cfg['x'], label_h_pt - cfg['y'] - cfg['fontSize']/2.8*mm, "Nokia Solutions and Networks")
         
         # AMID Text
-        cfg = l['amidText']
-        c.setFont("Helvetica-Bold", cfg['fontSize'])
-        c.drawString(cfg['x']*mm, (s['labelHeight'] - cfg['y'])*mm - (cfg['fontSize']/2.8)*mm, data['amid_code'])
+        cfg = p['amidText']
+        self._set_label_font(c, cfg['fontSize'])
+        c.drawString(cfg['x'], label_h_pt - cfg['y'] - cfg['fontSize']/2.8*mm, data['amid_code'])
 
         # --- DRAW BARCODES ---
-        def draw_barcode(cfg_key, barcode_value):
-            cfg = l[cfg_key]
+        for cfg_key, barcode_value in (
+            ('barcode1', f"1P{data['part_no']}"),
+            ('barcode2', f"S{data['serial_no']}"),
+            ('barcode3', f"Q{data['qty']}"),
+        ):
+            cfg = p[cfg_key]
+            x_pt = cfg['x']
             # Available width: up to CE mark or end
-            available_width_mm = 58 - cfg['x']
-            
-            bc = code128.Code128(barcode_value, barHeight=cfg['h']*mm, barWidth=s['barcodeWidthModule']*mm, quiet=0)
-            bc_width_mm = bc.width / mm
+            available_width_pt = self.BARCODE_LIMIT_PT - x_pt
             
-            if bc_width_mm > available_width_mm:
-                scaling_factor = available_width_mm / bc_width_mm
-                new_bar_width = s['barcodeWidthModule'] * scaling_factor
-                bc = code128.Code128(barcode_value, barHeight=cfg['h']*mm, barWidth=new_bar_width*mm, quiet=0)
+            bc = code128.Code128(barcode_value, barHeight=cfg['h'], barWidth=bar_module_pt, quiet=0)
+            # Width scales linearly with barWidth (quiet=0), so shrink the
+            # module width in place when the barcode would overflow
+            bc_width = bc.width
+            if bc_width > available_width_pt:
+                bc.barWidth = bar_module_pt * available_width_pt / bc_width
             
             # Position Y: CODESOFT Y is usually the top of the combined block (barcode + text)
             # Layout: Barcode on Top, Text Below
             y_rl = get_rl_y(cfg['y'], cfg['h'])
             # Shift barcode 1.2mm left to align first bar with text start (compensating for internal quiet zone)
             # REVERTED: User requested exact alignment with text. With quiet=0, they should match.
-            bc.drawOn(c, cfg['x']*mm, y_rl)
+            bc.drawOn(c, x_pt, y_rl)
             
             # Label Text Below
-            c.setFont("Helvetica-Bold", cfg['fontSize'])
+            self._set_label_font(c, cfg['fontSize'])
             label_text = cfg.get('label', '') 
             label_display = f"({label_text}) {barcode_value[len(label_text):] if label_text and barcode_value.startswith(label_text) else barcode_value}"
-            c.drawString(cfg['x']*mm, y_rl - (cfg['fontSize']/2.2)*mm, label_display)
-
-        draw_barcode('barcode1', f"1P{data['part_no']}")
-        draw_barcode('barcode2', f"S{data['serial_no']}")
-        draw_barcode('barcode3', f"Q{data['qty']}")
+            c.drawString(x_pt, y_rl - cfg['fontSize']/2.2*mm, label_display)
 
         # --- DRAW DATAMATRIX ---
-        cfg = l['dmBarcode']
-        dm_drawing = createBarcodeDrawing('ECC200DataMatrix',
-                          value=datamatrix_content,
-                          width=cfg['size']*mm,
-                          height=cfg['size']*mm)
-        dm_x = cfg['x']*mm
+        cfg = p['dmBarcode']
         dm_y = get_rl_y(cfg['y'], cfg['size'])
-        dm_drawing.drawOn(c, dm_x, dm_y)
+        self._draw_datamatrix(c, datamatrix_content, cfg['x'], dm_y, cfg['size'])
 
         # --- DRAW FOOTER ---
-        cfg = l['footer']
-        c.setFont("Helvetica-Bold", cfg['fontSize'])
-        c.drawCentredString(cfg['x']*mm, (s['labelHeight'] - cfg['y'])*mm, cfg['text'])
+        cfg = p['footer']
+        self._set_label_font(c, cfg['fontSize'])
+        c.drawCentredString(cfg['x'], label_h_pt - cfg['y'], cfg['text'])
+
+        return data
+
+# --- WORKER ENTRY POINTS: Label generation in a ProcessPoolExecutor ---
+# ReportLab is not thread-safe, so app.py renders labels in child processes.
+# Each worker owns one NokiaLabelService, created by the pool initializer.
+_worker_label_service = None
+
+
+def init_label_worker(output_folder):
+    global _worker_label_service
+    _worker_label_service = NokiaLabelService(output_folder=output_folder)
+
+
+def generate_label_job(raw_string, settings=None):
+    return _worker_label_service.generate_label(raw_string, settings)
+
+
+def generate_label_bytes_job(raw_string, settings=None):
+    return _worker_label_service.generate_label_bytes(raw_string, settings)
+
+
+def generate_batch_job(raw_strings, settings=None):
+    return _worker_label_service.generate_batch(raw_strings, settings)
 
-        c.save()
-        return file_path, data
 
 # --- REUSED SERVICE: Handles Printing ---
 class PrintService:
+    # Seconds a looked-up default printer stays valid before re-querying the spooler
+    DEFAULT_PRINTER_TTL = 30
+    # Seconds the discovered printer list is reused before enumerating again
+    PRINTER_LIST_TTL = 30
+    # Seconds to wait for the Mac/Linux viewer launcher before failing the job
+    VIEWER_TIMEOUT = 30
+
+    def __init__(self):
+        self._default_printer = None
+        self._default_printer_checked_at = 0.0
+        self._printer_list = None
+        self._printer_list_checked_at = 0.0
+
+    def _get_default_printer(self):
+        """Returns the Windows default printer, re-querying at most every DEFAULT_PRINTER_TTL seconds."""
+        now = time.monotonic()
+        if self._default_printer is None or now - self._default_printer_checked_at > self.DEFAULT_PRINTER_TTL:
+            self._default_printer = win32print.GetDefaultPrinter()
+            self._default_printer_checked_at = now
+        return self._default_printer
+
     def get_available_printers(self):
+        """Returns the printer list, re-enumerating at most every PRINTER_LIST_TTL seconds."""
+        now = time.monotonic()
+        if self._printer_list is None or now - self._printer_list_checked_at > self.PRINTER_LIST_TTL:
+            self._printer_list = self._discover_printers()
+            self._printer_list_checked_at = now
+        return {'printers': list(self._printer_list['printers']), 'default': self._printer_list['default']}
+
+    def _discover_printers(self):
         """Reused Logic from previous project"""
         printers = []
         default_printer = None
-        system = platform.system()
         
         try:
-            if system == 'Windows':
-                import win32print
+            if _IS_WINDOWS:
                 for printer in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS):
                     printers.append(printer[2])
-                default_printer = win32print.GetDefaultPrinter()
+                default_printer = self._get_default_printer()
             else:
                 # Mac/Linux Logic
                 result = subprocess.run(['lpstat', '-p'], capture_output=True, text=True)
@@ -527,95 +885,153 @@ class PrintService:
         Sends the PDF to the printer using GDI printing.
         Works without admin privileges by using win32ui CreateDC.
         """
-        system = platform.system()
         try:
-            if system == 'Windows':
-                import win32print
-                import win32ui
-                import win32con
-                from PIL import Image, ImageWin
-                import fitz  # PyMuPDF
-
+            if _IS_WINDOWS:
                 if not printer_name:
-                    printer_name = win32print.GetDefaultPrinter()
-
-                logger.info(f"Starting print job to: {printer_name}")
-
-                # Convert PDF to Image
-                pdf_document = fitz.open(file_path)
-                page = pdf_document[0]
-                
-                # Render at 300 DPI for crisp labels
-                mat = fitz.Matrix(300/72, 300/72)
-                pix = page.get_pixmap(matrix=mat)
-                
-                # Convert to PIL Image
-                img_data = pix.tobytes("ppm")
-                image = Image.open(BytesIO(img_data))
-                pdf_document.close()
-                
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                
-                logger.info(f"PDF converted to image: {image.size[0]}x{image.size[1]} pixels")
-                
-                # GDI Printing using Device Context
-                hDC = win32ui.CreateDC()
-                hDC.CreatePrinterDC(printer_name)
-                
-                # Get printable area (this just reads, doesn't modify settings)
-                printable_area = (
-                    hDC.GetDeviceCaps(win32con.HORZRES), 
-                    hDC.GetDeviceCaps(win32con.VERTRES)
-                )
-                
-                logger.info(f"Printer printable area: {printable_area[0]}x{printable_area[1]} pixels")
-                
-                # Calculate scaling to fit the label
-                ratio = min(
-                    printable_area[0] / image.size[0], 
-                    printable_area[1] / image.size[1]
-                )
-                scaled_size = (
-                    int(image.size[0] * ratio), 
-                    int(image.size[1] * ratio)
-                )
-                
-                # Resize image
-                bmp = image.resize(scaled_size, Image.Resampling.LANCZOS)
-                dib = ImageWin.Dib(bmp)
-                
-                # Start print job
-                hDC.StartDoc(os.path.basename(file_path))
-                hDC.StartPage()
-                
-                # Center the label on the page
-                x = (printable_area[0] - scaled_size[0]) // 2
-                y = (printable_area[1] - scaled_size[1]) // 2
-                
-                logger.info(f"Printing at: {scaled_size[0]}x{scaled_size[1]} pixels, offset: ({x}, {y})")
-                
-                # Draw to printer
-                dib.draw(hDC.GetHandleOutput(), (x, y, x + scaled_size[0], y + scaled_size[1]))
-                
-                hDC.EndPage()
-                hDC.EndDoc()
-                hDC.DeleteDC()
+                    printer_name = self._get_default_printer()
 
-                logger.info(f"Print job completed successfully")
+                self._print_gdi([file_path], os.path.basename(file_path), printer_name)
                 return True, f"Printed to {printer_name}"
             
             else:
                 # Mac/Linux - Open PDF in default viewer for testing
-                logger.info(f"Opening PDF in default viewer (Mac/Linux): {file_path}")
-                
-                if system == 'Darwin':  # macOS
-                    subprocess.run(['open', file_path], check=True)
-                else:  # Linux
-                    subprocess.run(['xdg-open', file_path], check=True)
-                
-                return True, "PDF opened in default viewer (Mac/Linux testing mode)"
+                return self._open_in_viewer(file_path)
+
+        except Exception as e:
+            logger.error(f"Printing error: {e}", exc_info=True)
+            return False, str(e)
+
+    def print_files(self, file_paths, printer_name=None):
+        """
+        Prints several label PDFs as a single spooler job: one printer DC and one
+        StartDoc/EndDoc around every page of every file.
+        """
+        if not file_paths:
+            return False, "No files to print"
+
+        try:
+            if _IS_WINDOWS:
+                if not printer_name:
+                    printer_name = self._get_default_printer()
+
+                job_name = os.path.basename(file_paths[0])
+                if len(file_paths) > 1:
+                    job_name = f"{job_name} (+{len(file_paths) - 1} more)"
+                self._print_gdi(file_paths, job_name, printer_name)
+                return True, f"Printed {len(file_paths)} files to {printer_name}"
+
+            else:
+                for path in file_paths:
+                    success, message = self._open_in_viewer(path)
+                    if not success:
+                        return False, message
+                return True, f"{len(file_paths)} PDFs opened in default viewer (Mac/Linux testing mode)"
 
         except Exception as e:
             logger.error(f"Printing error: {e}", exc_info=True)
             return False, str(e)
+
+    def _print_gdi(self, file_paths, job_name, printer_name):
+        """
+        Rasterizes every page of the PDFs at `file_paths` into one
+        GDI print job on `printer_name`. Returns the number of pages printed.
+        Every document is opened before the spooler job starts, so a missing or
+        corrupt label fails the job without leaving it half-queued.
+        """
+        logger.info(f"Starting print job to: {printer_name}")
+
+        documents = []
+        try:
+            for file_path in file_paths:
+                documents.append(fitz.open(file_path))
+                if documents[-1].page_count == 0:
+                    raise ValueError(f"Label PDF has no pages: {file_path}")
+
+            # GDI Printing using Device Context
+            hDC = win32ui.CreateDC()
+            hDC.CreatePrinterDC(printer_name)
+            try:
+                page_count = self._print_gdi_pages(hDC, documents, job_name)
+            finally:
+                hDC.DeleteDC()
+        finally:
+            for pdf_document in documents:
+                pdf_document.close()
+
+        logger.info(f"Print job completed successfully ({page_count} page(s))")
+        return page_count
+
+    def _print_gdi_pages(self, hDC, documents, job_name):
+        # Get printable area (this just reads, doesn't modify settings)
+        printable_area = (
+            hDC.GetDeviceCaps(win32con.HORZRES), 
+            hDC.GetDeviceCaps(win32con.VERTRES)
+        )
+        
+        logger.info(f"Printer printable area: {printable_area[0]}x{printable_area[1]} pixels")
+        
+        # Start print job; every page of every document is one label in the same job
+        hDC.StartDoc(job_name)
+        page_count = 0
+        try:
+            for pdf_document in documents:
+                for page in pdf_document:
+                    # Rasterize straight onto the printer's pixel grid (fit to the
+                    # printable area) so no resampling pass is needed afterwards
+                    zoom = min(
+                        printable_area[0] / page.rect.width, 
+                        printable_area[1] / page.rect.height
+                    )
+                    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                    
+                    # Wrap the raw RGB samples directly; no PPM encode/decode
+                    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                    
+                    # Pixmap bounds are rounded outwards; never exceed the printable area
+                    scaled_size = (
+                        min(image.size[0], printable_area[0]), 
+                        min(image.size[1], printable_area[1])
+                    )
+                    dib = ImageWin.Dib(image)
+                    
+                    hDC.StartPage()
+                    
+                    # Center the label on the page
+                    x = (printable_area[0] - scaled_size[0]) // 2
+                    y = (printable_area[1] - scaled_size[1]) // 2
+                    
+                    logger.info(f"Printing page {page_count + 1} at {zoom * 72:.0f} DPI: "
+                                f"{scaled_size[0]}x{scaled_size[1]} pixels, offset: ({x}, {y})")
+                    
+                    # Draw to printer
+                    dib.draw(hDC.GetHandleOutput(), (x, y, x + scaled_size[0], y + scaled_size[1]))
+                    
+                    hDC.EndPage()
+                    page_count += 1
+        except Exception:
+            # Drop the partial job from the spooler instead of leaving it open
+            hDC.AbortDoc()
+            raise
+        hDC.EndDoc()
+        return page_count
+
+    def _open_in_viewer(self, file_path):
+        """
+        Opens the PDF with the platform viewer and waits for the launcher to exit.
+        Returns (success, message); a nonzero exit or a hung launcher is a failure.
+        """
+        logger.info(f"Opening PDF in default viewer (Mac/Linux): {file_path}")
+        
+        if _SYSTEM == 'Darwin':  # macOS
+            cmd = ['open', file_path]
+        else:  # Linux
+            cmd = ['xdg-open', file_path]
+
+        # `open` / `xdg-open` return once the viewer is launched; this already runs
+        # on the print worker thread, so waiting does not hold up any request
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.VIEWER_TIMEOUT)
+        if result.returncode != 0:
+            error = result.stderr.strip() or f"exit code {result.returncode}"
+            logger.error(f"Viewer command {cmd[0]} failed for {file_path}: {error}")
+            return False, f"{cmd[0]} failed: {error}"
+        return True, "PDF opened in default viewer (Mac/Linux testing mode)"
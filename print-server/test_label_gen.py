@@ -1,5 +1,7 @@
 import os
 import sys
+import tempfile
+import time
 import unittest
 
 
@@ -10,9 +12,9 @@ from services import NokiaLabelService
 
 class NokiaLabelServiceTests(unittest.TestCase):
     def setUp(self):
-        temp_dir = os.path.join(os.path.dirname(__file__), 'temp_labels_test')
-        os.makedirs(temp_dir, exist_ok=True)
-        self.service = NokiaLabelService(output_folder=temp_dir)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.service = NokiaLabelService(output_folder=temp_dir.name)
 
     def test_concatenated_input_keeps_full_18v_segment(self):
         raw_input = '1P475773A.102SUK2550A0274Q14LIN18VLENOK'
@@ -37,6 +39,17 @@ class NokiaLabelServiceTests(unittest.TestCase):
             '[)>{RS}06{GS}1P475773A.102{GS}SUK2550A0274{GS}Q1{GS}4LIN{GS}18VLENOK{RS}{EOT}',
         )
 
+    def test_multi_line_concatenated_input_parses_in_linear_time(self):
+        # Values never span a line break, so each candidate must stop at the next newline
+        started = time.perf_counter()
+        part_lines = self.service.parse_nokia_string('X' + '1P\n' * 20000 + 'X')
+        serial_lines = self.service.parse_nokia_string('S\n' * 20000 + 'SUK2550A0274')
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(part_lines['part_no'], 'UNKNOWN')
+        self.assertEqual(serial_lines['serial_no'], 'UK2550A0274')
+        self.assertLess(elapsed, 1.0)
+
     def test_part_number_to_amid_code_mapping(self):
         mappings = [
             {'partNo': '475773A.102', 'amidCode': 'AMID'},
@@ -47,6 +60,77 @@ class NokiaLabelServiceTests(unittest.TestCase):
         self.assertEqual(self.service._resolve_amid_code('477066A.101', mappings), 'AMXB')
         self.assertEqual(self.service._resolve_amid_code('UNKNOWN.PART', mappings), 'AMID')
 
+    def test_identical_requests_reuse_generated_pdf(self):
+        raw_input = '1P475773A.102SUK2550A0274Q14LIN18VLENOK'
+        settings = {'labelWidth': 100, 'labelHeight': 38}
+
+        first_path, first_data = self.service.generate_label(raw_input, settings)
+        second_path, second_data = self.service.generate_label(raw_input, dict(settings))
+        other_path, _ = self.service.generate_label(raw_input, {'labelWidth': 90, 'labelHeight': 38})
+
+        self.assertEqual(first_path, second_path)
+        self.assertEqual(first_data, second_data)
+        self.assertNotEqual(first_path, other_path)
+
+    def test_cached_label_is_regenerated_after_its_file_is_pruned(self):
+        raw_input = '1P475773A.102SUK2550A0274Q1'
+        first_path, _ = self.service.generate_label(raw_input)
+        os.remove(first_path)
+
+        second_path, _ = self.service.generate_label(raw_input)
+
+        self.assertNotEqual(first_path, second_path)
+        self.assertTrue(os.path.exists(second_path))
+
+    def test_generate_label_bytes_stays_in_memory(self):
+        before = set(os.listdir(self.service.output_folder))
+
+        pdf_bytes, parsed = self.service.generate_label_bytes('1P475773A.102SUK2550A0274Q1')
+
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+        self.assertEqual(parsed['part_no'], '475773A.102')
+        self.assertEqual(set(os.listdir(self.service.output_folder)), before)
+
+    def test_generate_batch_writes_one_page_per_input(self):
+        raw_inputs = ['1P475773A.102SUK2550A0274Q1', '1P477066A.101SUK2550A0275Q1']
+
+        file_path, parsed = self.service.generate_batch(raw_inputs)
+
+        with open(file_path, 'rb') as pdf:
+            self.assertEqual(pdf.read().count(b'/Type /Page\n'), len(raw_inputs))
+        self.assertEqual([data['serial_no'] for data in parsed], ['UK2550A0274', 'UK2550A0275'])
+        self.assertEqual(parsed[1]['amid_code'], 'AMXB')
+
+    def test_generate_batch_rejects_empty_input(self):
+        before = set(os.listdir(self.service.output_folder))
+
+        with self.assertRaises(ValueError):
+            self.service.generate_batch([])
+        self.assertEqual(set(os.listdir(self.service.output_folder)), before)
+
+    def test_datamatrix_runs_cover_every_dark_module(self):
+        from reportlab.graphics.barcode import ecc200datamatrix
+
+        content = self.service.construct_iso15434_string(
+            self.service.parse_nokia_string('1P475773A.102SUK2550A0274Q14LIN18VLENOK')
+        )
+        encoder = ecc200datamatrix.ECC200DataMatrix(value=content)
+        encoder.validate()
+        expected = {(x, y) for y, row in enumerate(encoder.encode()) for x, dark in enumerate(row) if dark}
+
+        cols, rows, runs = self.service._get_datamatrix_runs(content)
+        covered = {(x + offset, y) for x, y, length in runs for offset in range(length)}
+
+        self.assertEqual((cols, rows), (encoder.col_modules, encoder.row_modules))
+        self.assertEqual(covered, expected)
+
+    def test_merged_settings_do_not_leak_between_calls(self):
+        custom = self.service._merge_settings({'layout': {'footer': {'text': 'Made in Finland'}}})
+        default = self.service._merge_settings(None)
+
+        self.assertEqual(custom['layout']['footer']['text'], 'Made in Finland')
+        self.assertEqual(default['layout']['footer']['text'], 'Made in India')
+
 
 if __name__ == '__main__':
     unittest.main()